@@ -0,0 +1,348 @@
+# ArrayAVLTree.py
+# Array-backed AVLTree engine: same operations, no per-node Python objects.
+from array import array
+
+NIL = 0  # slot 0 is the shared virtual sentinel (height -1)
+
+
+class ArrayAVLTree:
+    """
+    AVL tree stored as parallel columns indexed by slot number:
+        keys, values       - lists of object references
+        left, right, parent - array('i') (int32 slot indices)
+        height             - array('b') (int8)
+    A node is its slot index: search returns an index (or None) and delete
+    takes one. Freed slots are chained through `left` and reused by insert.
+    """
+
+    def __init__(self, verify=False):
+        self.keys = [None]
+        self.values = [None]
+        self.left = array('i', [NIL])
+        self.right = array('i', [NIL])
+        self.parent = array('i', [NIL])
+        self.height = array('b', [-1])
+        self._free = NIL
+
+        self.root = NIL
+        self.max_node = NIL
+        self._size = 0
+        self._bf0_count = 0
+        self.verify = verify
+
+        self._inorder_cache = []
+        self._cache_valid = False
+
+    def get_root(self):
+        return None if self.root == NIL else self.root
+
+    def size(self):
+        return self._size
+
+    def get_size(self):
+        return self._size
+
+    def get_key(self, i):
+        return self.keys[i]
+
+    def get_value(self, i):
+        return self.values[i]
+
+    def _new_node(self, key, val, parent):
+        i = self._free
+        if i != NIL:
+            self._free = self.left[i]
+            self.keys[i] = key
+            self.values[i] = val
+            self.left[i] = self.right[i] = NIL
+            self.parent[i] = parent
+            self.height[i] = 0
+        else:
+            i = len(self.keys)
+            self.keys.append(key)
+            self.values.append(val)
+            self.left.append(NIL)
+            self.right.append(NIL)
+            self.parent.append(parent)
+            self.height.append(0)
+        return i
+
+    def _free_node(self, i):
+        self.keys[i] = self.values[i] = None
+        self.right[i] = self.parent[i] = NIL
+        self.left[i] = self._free
+        self._free = i
+
+    def search(self, key):
+        keys, left, right = self.keys, self.left, self.right
+        i = self.root
+        while i != NIL:
+            k = keys[i]
+            if key == k:
+                return i
+            i = left[i] if key < k else right[i]
+        return None
+
+    def _update_height(self, i):
+        h = self.height
+        h[i] = 1 + max(h[self.left[i]], h[self.right[i]])
+
+    def _balance_factor(self, i):
+        return self.height[self.left[i]] - self.height[self.right[i]]
+
+    def _is_bf0(self, i):
+        return 1 if i != NIL and self._balance_factor(i) == 0 else 0
+
+    def _replace_child(self, p, old, new):
+        if p == NIL:
+            self.root = new
+        elif self.left[p] == old:
+            self.left[p] = new
+        else:
+            self.right[p] = new
+
+    def _rotate_left(self, z):
+        left, right, parent = self.left, self.right, self.parent
+        y = right[z]
+        right[z] = left[y]
+        if left[y] != NIL:
+            parent[left[y]] = z
+        parent[y] = parent[z]
+        self._replace_child(parent[z], z, y)
+        left[y] = z
+        parent[z] = y
+        self._update_height(z)
+        self._update_height(y)
+        return y
+
+    def _rotate_right(self, z):
+        left, right, parent = self.left, self.right, self.parent
+        y = left[z]
+        left[z] = right[y]
+        if right[y] != NIL:
+            parent[right[y]] = z
+        parent[y] = parent[z]
+        self._replace_child(parent[z], z, y)
+        right[y] = z
+        parent[z] = y
+        self._update_height(z)
+        self._update_height(y)
+        return y
+
+    def _rebalance_with_count(self, i):
+        """Index version of AVLTree._rebalance_with_count."""
+        count = 0
+        while i != NIL:
+            p = self.parent[i]
+            self._bf0_count -= self._is_bf0(p)
+            old_height = self.height[i]
+
+            self._update_height(i)
+            bf = self._balance_factor(i)
+
+            if bf > 1:
+                y = self.left[i]
+                if self._balance_factor(y) < 0:
+                    x = self.right[y]
+                    self._bf0_count -= self._is_bf0(y) + self._is_bf0(x)
+                    self._rotate_left(y);  count += 1
+                    self._rotate_right(i); count += 1
+                    self._bf0_count += self._is_bf0(x)
+                else:
+                    self._bf0_count -= self._is_bf0(y)
+                    self._rotate_right(i); count += 1
+                self._bf0_count += self._is_bf0(i) + self._is_bf0(y)
+                i = self.parent[i]
+            elif bf < -1:
+                y = self.right[i]
+                if self._balance_factor(y) > 0:
+                    x = self.left[y]
+                    self._bf0_count -= self._is_bf0(y) + self._is_bf0(x)
+                    self._rotate_right(y); count += 1
+                    self._rotate_left(i);  count += 1
+                    self._bf0_count += self._is_bf0(x)
+                else:
+                    self._bf0_count -= self._is_bf0(y)
+                    self._rotate_left(i);  count += 1
+                self._bf0_count += self._is_bf0(i) + self._is_bf0(y)
+                i = self.parent[i]
+            else:
+                self._bf0_count += self._is_bf0(i)
+                if self.height[i] != old_height:
+                    count += 1
+
+            if self.height[i] == old_height:
+                self._bf0_count += self._is_bf0(p)
+                break
+            i = p
+        return count
+
+    def _finger_start(self, finger, key):
+        """Index version of AVLTree._finger_start."""
+        keys, left, right, parent = self.keys, self.left, self.right, self.parent
+        u = finger
+        if u == self.max_node and key > keys[u]:
+            return u
+        if key > keys[u]:
+            while parent[u] != NIL:
+                p = parent[u]
+                if left[p] == u and key < keys[p]:
+                    break
+                u = p
+        elif key < keys[u]:
+            while parent[u] != NIL:
+                p = parent[u]
+                if right[p] == u and key > keys[p]:
+                    break
+                u = p
+        return u
+
+    def insert(self, key, val, start="root"):
+        """
+        Insert key,val or overwrite existing.
+        start: "root", "max" or a slot index to use as the finger; anything
+        else starts at the root. Locating costs up to ~2x a root walk, see
+        AVLTree.insert.
+        Returns rotation count.
+        """
+        self._cache_valid = False
+        keys = self.keys
+
+        if self.root == NIL:
+            z = self._new_node(key, val, NIL)
+            self.root = self.max_node = z
+            self._size = 1
+            self._bf0_count = 1
+            return 0
+
+        if start == "max":
+            i = self._finger_start(self.max_node, key)
+        elif type(start) is int and start != NIL:
+            i = self._finger_start(start, key)
+        else:
+            i = self.root
+        p = NIL
+        while i != NIL:
+            p = i
+            k = keys[i]
+            if key == k:
+                self.values[i] = val
+                return 0
+            i = self.left[i] if key < k else self.right[i]
+
+        z = self._new_node(key, val, p)
+        self._bf0_count -= self._is_bf0(p)
+        if key < keys[p]:
+            self.left[p] = z
+        else:
+            self.right[p] = z
+        self._bf0_count += 1
+
+        self._size += 1
+        if key > keys[self.max_node]:
+            self.max_node = z
+
+        ops = self._rebalance_with_count(p)
+        if self.verify:
+            self._verify_bf0()
+        return ops
+
+    def delete(self, node):
+        if node is None or node == NIL:
+            return 0
+        self._cache_valid = False
+        left, right, parent = self.left, self.right, self.parent
+
+        if left[node] == NIL or right[node] == NIL:
+            y = node
+        else:
+            y = right[node]
+            while left[y] != NIL:
+                y = left[y]
+
+        x = left[y] if left[y] != NIL else right[y]
+        p = parent[y]
+        self._bf0_count -= self._is_bf0(y) + self._is_bf0(p)
+        if x != NIL:
+            parent[x] = p
+        self._replace_child(p, y, x)
+
+        if y != node:
+            self.keys[node] = self.keys[y]
+            self.values[node] = self.values[y]
+
+        self._size -= 1
+        if y == self.max_node:
+            self.max_node = node if y != node else NIL
+        self._free_node(y)
+
+        ops = self._rebalance_with_count(p)
+        if self.max_node == NIL and self._size:
+            m = self.root
+            while right[m] != NIL:
+                m = right[m]
+            self.max_node = m
+        if self.verify:
+            self._verify_bf0()
+        return ops
+
+    def avl_to_array(self):
+        """
+        In-order list of (key,value).
+        Best: O(1) cache; Worst: O(n); Amortized: O(1) after first
+        """
+        if self._cache_valid:
+            return self._inorder_cache
+        keys, values, left, right = self.keys, self.values, self.left, self.right
+        res = []
+        stack = []
+        i = self.root
+        while stack or i != NIL:
+            while i != NIL:
+                stack.append(i)
+                i = left[i]
+            i = stack.pop()
+            res.append((keys[i], values[i]))
+            i = right[i]
+        self._inorder_cache = res
+        self._cache_valid = True
+        return res
+
+    def get_amir_balance_factor(self):
+        if self._size == 0:
+            return 0.0
+        return self._bf0_count / self._size
+
+    def _verify_shape(self):
+        stack = [self.root]
+        while stack:
+            i = stack.pop()
+            if i == NIL:
+                continue
+            l, r = self.left[i], self.right[i]
+            if self.height[i] != 1 + max(self.height[l], self.height[r]):
+                raise AssertionError("stale height at key %r" % (self.keys[i],))
+            if abs(self._balance_factor(i)) > 1:
+                raise AssertionError("AVL violation at key %r" % (self.keys[i],))
+            stack.append(l)
+            stack.append(r)
+
+    def _count_bf0_nodes(self):
+        count = 0
+        stack = [self.root]
+        while stack:
+            i = stack.pop()
+            if i == NIL:
+                continue
+            if self._balance_factor(i) == 0:
+                count += 1
+            stack.append(self.left[i])
+            stack.append(self.right[i])
+        return count
+
+    def _verify_bf0(self):
+        self._verify_shape()
+        expected = self._count_bf0_nodes()
+        if self._bf0_count != expected:
+            raise AssertionError(
+                "bf0 counter out of sync: %d != %d" % (self._bf0_count, expected))
@@ -0,0 +1,219 @@
+# ConcurrentAVLTree.py
+# Thread-safe front-end for AVLTree: parallel readers behind a reader-writer
+# lock, writes queued and applied in sorted batches by one writer thread.
+import threading
+from operator import itemgetter
+
+from AVLTree import AVLNode, AVLTree
+
+_DELETE = object()  # queued value marking a delete
+
+
+class RWLock:
+    """Reader-writer lock; waiting writers block new readers (no starvation)."""
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    def acquire_read(self):
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self):
+        with self._cond:
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+
+    def release_write(self):
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+
+class ConcurrentAVLTree:
+    """
+    Wraps an AVLTree for use from many threads.
+    Reads (search/get/size/items/avl_to_array) run concurrently under the
+    read lock. insert/delete only enqueue; a single writer thread drains the
+    queue, keeps the last op per key, and applies the batch in key order
+    under the write lock (inserts through AVLTree.insert_many). Call flush()
+    to wait until everything queued so far is visible to readers.
+    Batching amortizes the write lock only: it does not share rebalancing.
+    insert_many inserts key by key unless the batch is a sizeable fraction
+    of the tree (with max_batch=4096, every tree above ~20k keys), and
+    deletes are always one by one. The price is visibility: a write waits
+    for the writer thread, ~5 ms p50 after flush() vs ~7 us under a plain
+    global lock (bench_concurrent.py, n=1e4, 8 threads, 10% writes).
+    Unlike AVLTree.delete, delete takes a key (a node is accepted for its key).
+    A write that fails in the writer thread is re-raised by the next flush()
+    or close(); the rest of its batch is still applied.
+    """
+
+    def __init__(self, tree=None, max_batch=4096):
+        self.tree = tree if tree is not None else AVLTree()
+        self.max_batch = max_batch
+        self._lock = RWLock()
+
+        self._queue = []
+        self._queue_cond = threading.Condition(threading.Lock())
+        self._enqueued = 0  # ops ever queued
+        self._applied = 0   # ops ever applied
+        self._closed = False
+        self._error = None  # first failed write, re-raised by flush/close
+        self.rotations = 0
+
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    # reads
+
+    def search(self, key):
+        """
+        Node holding key, or None. The node may be changed by later writes;
+        use get() to read the value atomically.
+        """
+        self._lock.acquire_read()
+        try:
+            return self.tree.search(key)
+        finally:
+            self._lock.release_read()
+
+    def get(self, key, default=None):
+        self._lock.acquire_read()
+        try:
+            node = self.tree.search(key)
+            return default if node is None else node.value
+        finally:
+            self._lock.release_read()
+
+    def size(self):
+        return self.tree.size()
+
+    def items(self, lo=None, hi=None, reverse=False):
+        """List of (key,value) with lo <= key < hi, read under one lock hold."""
+        self._lock.acquire_read()
+        try:
+            return list(self.tree.items(lo, hi, reverse))
+        finally:
+            self._lock.release_read()
+
+    def avl_to_array(self):
+        return self.items()
+
+    # writes
+
+    def insert(self, key, val):
+        if key is None:
+            # None keys mark the tree's sentinel node
+            raise ValueError("ConcurrentAVLTree keys cannot be None")
+        self._enqueue(key, val)
+
+    def delete(self, key):
+        """Queue deletion of key. None (a missed search) is a no-op."""
+        if isinstance(key, AVLNode):
+            key = key.key
+        if key is None:
+            return
+        self._enqueue(key, _DELETE)
+
+    def _enqueue(self, key, val):
+        with self._queue_cond:
+            if self._closed:
+                raise RuntimeError("ConcurrentAVLTree is closed")
+            self._queue.append((key, val))
+            self._enqueued += 1
+            self._queue_cond.notify_all()
+
+    def flush(self):
+        """Block until every op queued before this call has been applied."""
+        with self._queue_cond:
+            target = self._enqueued
+            while self._applied < target:
+                self._queue_cond.wait()
+        self._raise_error()
+
+    def close(self):
+        """Apply pending writes and stop the writer thread."""
+        with self._queue_cond:
+            self._closed = True
+            self._queue_cond.notify_all()
+        self._writer.join()
+        self._raise_error()
+
+    def _raise_error(self):
+        with self._queue_cond:
+            err, self._error = self._error, None
+        if err is not None:
+            raise err
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write_loop(self):
+        while True:
+            with self._queue_cond:
+                while not self._queue and not self._closed:
+                    self._queue_cond.wait()
+                if not self._queue:
+                    return
+                ops = self._queue[:self.max_batch]
+                del self._queue[:self.max_batch]
+
+            try:
+                self._apply(ops)
+            except Exception:
+                # e.g. incomparable keys: replay one op at a time in queue
+                # order so only the failing writes are dropped
+                self._apply_each(ops)
+            finally:
+                with self._queue_cond:
+                    self._applied += len(ops)
+                    self._queue_cond.notify_all()
+
+    def _apply_each(self, ops):
+        for key, val in ops:
+            try:
+                self._apply([(key, val)])
+            except Exception as e:
+                with self._queue_cond:
+                    if self._error is None:
+                        self._error = e
+
+    def _apply(self, ops):
+        # stable sort keeps queue order within a key; the last op wins
+        ops = sorted(ops, key=itemgetter(0))
+        inserts = []
+        deletes = []
+        for i, (key, val) in enumerate(ops):
+            if i + 1 < len(ops) and ops[i + 1][0] == key:
+                continue
+            if val is _DELETE:
+                deletes.append(key)
+            else:
+                inserts.append((key, val))
+
+        self._lock.acquire_write()
+        try:
+            rotations = self.tree.insert_many(inserts)
+            for key in deletes:
+                rotations += self.tree.delete(self.tree.search(key))
+            self.rotations += rotations
+        finally:
+            self._lock.release_write()
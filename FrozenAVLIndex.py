@@ -0,0 +1,100 @@
+# FrozenAVLIndex.py
+# Immutable NumPy export of an AVLTree (AVLTree.freeze()): sorted key and
+# value arrays answering whole batches with np.searchsorted.
+try:
+    import numpy as np
+except ImportError:  # optional dependency, only needed for freeze()
+    np = None
+
+
+class FrozenAVLIndex:
+    """
+    keys   - sorted 1-D array (int64/float64 when possible, else object)
+    values - 1-D array aligned with keys
+    Every query is vectorized over the probe array: no per-probe Python work.
+    """
+
+    def __init__(self, items):
+        if np is None:
+            raise ImportError("FrozenAVLIndex requires numpy")
+        keys, values = [], []
+        for k, v in items:
+            keys.append(k)
+            values.append(v)
+        self.keys = _column(keys)
+        self.values = _column(values)
+
+    def size(self):
+        return len(self.keys)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def index_of(self, probes):
+        """Position of each probe in keys, -1 where missing."""
+        if self.keys.dtype == object:
+            probes = _objects(list(probes))
+        else:
+            probes = np.asarray(probes)
+        n = len(self.keys)
+        if n == 0:
+            return np.full(probes.shape, -1, dtype=np.int64)
+        idx = np.searchsorted(self.keys, probes)
+        clipped = np.minimum(idx, n - 1)
+        found = (idx < n) & (self.keys[clipped] == probes)
+        return np.where(found, clipped, -1)
+
+    def contains(self, probes):
+        return self.index_of(probes) >= 0
+
+    def get_many(self, probes, default=None):
+        """Value for each probe, default where missing."""
+        idx = self.index_of(probes)
+        if len(self.keys) == 0:
+            return np.full(idx.shape, default, dtype=object)
+        return np.where(idx >= 0, self.values[np.maximum(idx, 0)], default)
+
+    def count_range(self, lo, hi):
+        """Number of keys with lo <= key < hi; lo/hi may be arrays."""
+        return (np.searchsorted(self.keys, hi, side="left")
+                - np.searchsorted(self.keys, lo, side="left"))
+
+    def items(self, lo=None, hi=None):
+        i = 0 if lo is None else int(np.searchsorted(self.keys, lo))
+        j = len(self.keys) if hi is None else int(np.searchsorted(self.keys, hi))
+        return zip(self.keys[i:j].tolist(), self.values[i:j].tolist())
+
+    def avl_to_array(self):
+        return list(self.items())
+
+
+def _dtype(objs):
+    """numpy dtype when every element has the same exact type, else None."""
+    if not objs:
+        return None
+    t = type(objs[0])
+    if any(type(o) is not t for o in objs):
+        return None
+    if t is int:
+        # like MappedAVLTree's "q" column: only when every value fits int64
+        return np.int64 if all(-2 ** 63 <= o < 2 ** 63 for o in objs) else None
+    if t is float:
+        return np.float64
+    # str/bytes stay object: numpy's U/S dtypes drop trailing NULs, which
+    # would merge distinct keys like b"a" and b"a\0"
+    return None
+
+
+def _objects(objs):
+    col = np.empty(len(objs), dtype=object)
+    for i, o in enumerate(objs):
+        col[i] = o
+    return col
+
+
+def _column(objs):
+    """Typed array for all-int / all-float, else object."""
+    dtype = _dtype(objs)
+    if dtype is None:
+        return _objects(objs)
+    return np.asarray(objs, dtype=dtype)
@@ -0,0 +1,190 @@
+# MappedAVLTree.py
+# On-disk AVLTree format and a read-only tree served from a memory map.
+#
+# Layout (native little-endian, every section 8-byte aligned):
+#   header   magic "AVLTREE1", n (int64), key column code, value column code
+#   keys     column
+#   values   column
+#   heights  n x int8, in-order node heights (the tree shape)
+# Column codes:
+#   q  n x int64        d  n x float64
+#   p  (n+1) x int64 offsets into a blob of pickles, then the blob
+import mmap as _mmap
+import pickle
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+from AVLTree import AVLNode, AVLTree
+
+MAGIC = b"AVLTREE1"
+HEADER = struct.Struct("<8sq1s1s6x")
+
+
+def _column_code(objs):
+    if all(type(o) is int and -2 ** 63 <= o < 2 ** 63 for o in objs):
+        return b"q"
+    if all(type(o) is float for o in objs):
+        return b"d"
+    return b"p"
+
+
+def _write_column(f, code, objs):
+    if code != b"p":
+        f.write(array(code.decode(), objs).tobytes())
+        return
+    blobs = [pickle.dumps(o, pickle.HIGHEST_PROTOCOL) for o in objs]
+    offsets = array("q", [0])
+    for b in blobs:
+        offsets.append(offsets[-1] + len(b))
+    f.write(offsets.tobytes())
+    f.write(b"".join(blobs))
+    f.write(b"\0" * (-offsets[-1] % 8))
+
+
+def dump(tree, path):
+    """Write tree in in-order column format. O(n)"""
+    if sys.byteorder != "little":
+        raise ValueError("AVLTree files are little-endian only")
+    keys, values, heights = [], [], array("b")
+    for n in tree._iter_nodes():
+        keys.append(n.key)
+        values.append(n.value)
+        heights.append(n.height)
+    kcode, vcode = _column_code(keys), _column_code(values)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(keys), kcode, vcode))
+        _write_column(f, kcode, keys)
+        _write_column(f, vcode, values)
+        f.write(heights.tobytes())
+
+
+class _PickleColumn:
+    """Sequence view over a pickled column; items decode on access."""
+
+    def __init__(self, buf, offsets, base):
+        self._buf = buf
+        self._offsets = offsets
+        self._base = base
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        start = self._base + self._offsets[i]
+        return pickle.loads(self._buf[start:self._base + self._offsets[i + 1]])
+
+
+class MappedAVLTree:
+    """
+    Read-only tree over a dumped file. Keys, values and heights stay in the
+    buffer (normally an mmap); search and range scans binary-search the
+    sorted key column, so no per-node objects are created.
+    promote() builds a mutable AVLTree with the stored shape.
+    """
+
+    def __init__(self, path, use_mmap=True):
+        if sys.byteorder != "little":
+            raise ValueError("AVLTree files are little-endian only")
+        with open(path, "rb") as f:
+            if use_mmap:
+                self._map = _mmap.mmap(f.fileno(), 0, access=_mmap.ACCESS_READ)
+                buf = memoryview(self._map)
+            else:
+                self._map = None
+                buf = memoryview(f.read())
+        # every view is released in close() so the map can be unmapped
+        self._views = [buf]
+        magic, n, kcode, vcode = HEADER.unpack_from(buf, 0)
+        if magic != MAGIC:
+            raise ValueError("%s is not a dumped AVLTree" % path)
+        self._size = n
+        pos = HEADER.size
+        self._keys, pos = self._read_column(buf, kcode, n, pos)
+        self._values, pos = self._read_column(buf, vcode, n, pos)
+        self._heights = self._view(buf, pos, pos + n, "b")
+
+    def _view(self, buf, start, end, fmt):
+        v = buf[start:end].cast(fmt)
+        self._views.append(v)
+        return v
+
+    def _read_column(self, buf, code, n, pos):
+        if code != b"p":
+            end = pos + 8 * n
+            return self._view(buf, pos, end, code.decode()), end
+        end = pos + 8 * (n + 1)
+        offsets = self._view(buf, pos, end, "q")
+        blob_end = end + offsets[n]
+        return _PickleColumn(buf, offsets, end), blob_end + (-blob_end % 8)
+
+    def close(self):
+        for v in reversed(self._views):
+            v.release()
+        if self._map is not None:
+            self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def size(self):
+        return self._size
+
+    def get_size(self):
+        return self._size
+
+    def __len__(self):
+        return self._size
+
+    def search(self, key):
+        """Detached AVLNode with key and value, or None. O(log n)"""
+        i = bisect_left(self._keys, key)
+        if i < self._size and self._keys[i] == key:
+            return AVLNode(key, self._values[i])
+        return None
+
+    def __iter__(self):
+        return self.keys()
+
+    def _range(self, lo, hi):
+        i = 0 if lo is None else bisect_left(self._keys, lo)
+        j = self._size if hi is None else bisect_left(self._keys, hi)
+        return range(i, max(i, j))
+
+    def items(self, lo=None, hi=None, reverse=False):
+        """Lazy (key,value) pairs with lo <= key < hi. O(log n + k)"""
+        r = self._range(lo, hi)
+        for i in reversed(r) if reverse else r:
+            yield self._keys[i], self._values[i]
+
+    def keys(self, lo=None, hi=None, reverse=False):
+        r = self._range(lo, hi)
+        for i in reversed(r) if reverse else r:
+            yield self._keys[i]
+
+    def values(self, lo=None, hi=None, reverse=False):
+        r = self._range(lo, hi)
+        for i in reversed(r) if reverse else r:
+            yield self._values[i]
+
+    def avl_to_array(self):
+        return list(self.items())
+
+    def promote(self, verify=False):
+        """Mutable AVLTree with the same contents and shape. O(n)"""
+        return AVLTree._from_shape(self.items(), self._heights, verify)
+
+
+def load(path, mmap=True):
+    """
+    mmap=True: read-only MappedAVLTree over the file.
+    mmap=False: the file is read once and a mutable AVLTree is returned.
+    """
+    if mmap:
+        return MappedAVLTree(path)
+    with MappedAVLTree(path, use_mmap=False) as t:
+        return t.promote()
@@ -0,0 +1,246 @@
+# PersistentAVLTree.py
+# Parent-free, path-copying AVL tree. A write copies only the O(log n) nodes
+# on its path and never mutates a published node, so a snapshot is just a
+# reference to an old root.
+
+
+class PNode:
+    # nodes are immutable once built; there is no parent pointer to patch
+    __slots__ = ("key", "value", "left", "right", "height", "size")
+
+    def __init__(self, key, value, left, right):
+        self.key = key
+        self.value = value
+        self.left = left
+        self.right = right
+        self.height = 1 + max(left.height, right.height)
+        self.size = 1 + left.size + right.size
+
+    def is_real_node(self):
+        return self.key is not None
+
+    def get_key(self):
+        return self.key
+
+    def get_value(self):
+        return self.value
+
+
+def _make_virtual():
+    v = PNode.__new__(PNode)
+    v.key = v.value = None
+    v.left = v.right = v
+    v.height = -1
+    v.size = 0
+    return v
+
+
+_VIRTUAL = _make_virtual()
+
+
+class _Reads:
+    """Read-only operations shared by the tree and its snapshots."""
+    __slots__ = ()
+
+    def get_root(self):
+        return None if not self.root.is_real_node() else self.root
+
+    def size(self):
+        return self.root.size
+
+    def get_size(self):
+        return self.root.size
+
+    def __len__(self):
+        return self.root.size
+
+    def search(self, key):
+        node = self.root
+        while node.is_real_node():
+            if key == node.key:
+                return node
+            node = node.left if key < node.key else node.right
+        return None
+
+    def __iter__(self):
+        return self.keys()
+
+    def items(self, lo=None, hi=None, reverse=False):
+        """
+        Lazy in-order (key,value) pairs with lo <= key < hi (None = unbounded).
+        Explicit stack: O(log n + k) time, O(log n) extra memory.
+        """
+        for n in self._iter_nodes(lo, hi, reverse):
+            yield n.key, n.value
+
+    def keys(self, lo=None, hi=None, reverse=False):
+        for n in self._iter_nodes(lo, hi, reverse):
+            yield n.key
+
+    def values(self, lo=None, hi=None, reverse=False):
+        for n in self._iter_nodes(lo, hi, reverse):
+            yield n.value
+
+    def _iter_nodes(self, lo, hi, reverse):
+        stack = []
+        n = self.root
+        if reverse:
+            while n.is_real_node():
+                if hi is None or n.key < hi:
+                    stack.append(n)
+                    n = n.right
+                else:
+                    n = n.left
+            while stack:
+                n = stack.pop()
+                if lo is not None and n.key < lo:
+                    return
+                yield n
+                n = n.left
+                while n.is_real_node():
+                    stack.append(n)
+                    n = n.right
+        else:
+            while n.is_real_node():
+                if lo is None or not n.key < lo:
+                    stack.append(n)
+                    n = n.left
+                else:
+                    n = n.right
+            while stack:
+                n = stack.pop()
+                if hi is not None and not n.key < hi:
+                    return
+                yield n
+                n = n.right
+                while n.is_real_node():
+                    stack.append(n)
+                    n = n.left
+
+    def avl_to_array(self):
+        """In-order list of (key,value). O(n)"""
+        return list(self.items())
+
+
+class AVLSnapshot(_Reads):
+    """Immutable view of a PersistentAVLTree at the time snapshot() ran."""
+    __slots__ = ("root",)
+
+    def __init__(self, root):
+        self.root = root
+
+
+class PersistentAVLTree(_Reads):
+    """
+    AVL tree with O(1) snapshots. insert/delete build a new root by copying
+    their search path; nodes reachable from an older root never change, so
+    snapshots can be read from other threads while writes continue.
+    """
+
+    def __init__(self):
+        self.virtual = _VIRTUAL
+        self.root = self.virtual
+        self._ops = 0
+
+    def snapshot(self):
+        return AVLSnapshot(self.root)
+
+    @classmethod
+    def from_sorted(cls, items):
+        """Perfectly balanced tree from (key,value) pairs sorted by key. O(n)"""
+        pairs = list(items)
+        tree = cls()
+
+        def build(lo, hi):
+            if lo >= hi:
+                return tree.virtual
+            mid = (lo + hi) // 2
+            key, val = pairs[mid]
+            return PNode(key, val, build(lo, mid), build(mid + 1, hi))
+
+        tree.root = build(0, len(pairs))
+        return tree
+
+    def insert(self, key, val):
+        """
+        Insert key,val or overwrite existing.
+        Returns rebalance steps (rotations plus height changes), as AVLTree.
+        """
+        self._ops = 0
+        self.root = self._insert(self.root, key, val)
+        return self._ops
+
+    def delete(self, node):
+        """
+        Delete the key of node (as returned by search).
+        Returns rebalance steps (rotations plus height changes), as AVLTree.
+        """
+        if node is None or not node.is_real_node():
+            return 0
+        self._ops = 0
+        self.root = self._delete(self.root, node.key)
+        return self._ops
+
+    def _insert(self, n, key, val):
+        if not n.is_real_node():
+            return PNode(key, val, self.virtual, self.virtual)
+        if key == n.key:
+            return PNode(key, val, n.left, n.right)
+        if key < n.key:
+            return self._balance(n, n.key, n.value, self._insert(n.left, key, val), n.right)
+        return self._balance(n, n.key, n.value, n.left, self._insert(n.right, key, val))
+
+    def _delete(self, n, key):
+        if not n.is_real_node():
+            return n
+        if key < n.key:
+            return self._balance(n, n.key, n.value, self._delete(n.left, key), n.right)
+        if n.key < key:
+            return self._balance(n, n.key, n.value, n.left, self._delete(n.right, key))
+        if not n.left.is_real_node():
+            return n.right
+        if not n.right.is_real_node():
+            return n.left
+        m, right = self._pop_min(n.right)
+        return self._balance(n, m.key, m.value, n.left, right)
+
+    def _pop_min(self, n):
+        """(min node, subtree without it)"""
+        if not n.left.is_real_node():
+            return n, n.right
+        m, left = self._pop_min(n.left)
+        return m, self._balance(n, n.key, n.value, left, n.right)
+
+    def _balance(self, old, key, val, l, r):
+        """
+        New node over l, r replacing old, rotating if their heights differ
+        by 2. Counts like AVLTree: each rotation, or one step when the
+        height changes without a rotation.
+        """
+        bf = l.height - r.height
+        if bf > 1:
+            if l.left.height < l.right.height:
+                # LR
+                x = l.right
+                self._ops += 2
+                return PNode(x.key, x.value,
+                             PNode(l.key, l.value, l.left, x.left),
+                             PNode(key, val, x.right, r))
+            # LL
+            self._ops += 1
+            return PNode(l.key, l.value, l.left, PNode(key, val, l.right, r))
+        if bf < -1:
+            if r.right.height < r.left.height:
+                # RL
+                x = r.left
+                self._ops += 2
+                return PNode(x.key, x.value,
+                             PNode(key, val, l, x.left),
+                             PNode(r.key, r.value, x.right, r.right))
+            # RR
+            self._ops += 1
+            return PNode(r.key, r.value, PNode(key, val, l, r.left), r.right)
+        n = PNode(key, val, l, r)
+        if n.height != old.height:
+            self._ops += 1
+        return n
@@ -0,0 +1,115 @@
+# bench_concurrent.py
+# Multi-threaded mixed workload: AVLTree behind one global lock vs
+# ConcurrentAVLTree (reader-writer lock + batched writer).
+# Reports throughput, read latency, enqueue latency (time for insert/delete
+# to return) and visible latency (time until the write is applied: the call
+# plus flush(), measured on every VISIBLE_EVERY-th write per thread).
+# usage: python bench_concurrent.py [n] [threads] [ops_per_thread] [write_ratio]
+import random
+import sys
+import threading
+import time
+
+from AVLTree import AVLTree, nearest_rank
+from ConcurrentAVLTree import ConcurrentAVLTree
+
+VISIBLE_EVERY = 16
+
+
+class LockedAVLTree:
+    """The baseline: every call under one global lock."""
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            node = self.tree.search(key)
+            return None if node is None else node.value
+
+    def insert(self, key, val):
+        with self.lock:
+            self.tree.insert(key, val)
+
+    def delete(self, key):
+        with self.lock:
+            self.tree.delete(self.tree.search(key))
+
+    def flush(self):
+        pass
+
+
+def percentile(sorted_vals, p):
+    if not sorted_vals:
+        return 0.0
+    return nearest_rank(sorted_vals, p)
+
+
+def run(front, n, threads, ops, write_ratio):
+    reads = [[] for _ in range(threads)]
+    enqueues = [[] for _ in range(threads)]
+    visible = [[] for _ in range(threads)]
+
+    def worker(i):
+        rnd = random.Random(i)
+        clock = time.perf_counter
+        nwrites = 0
+        for _ in range(ops):
+            k = rnd.randrange(2 * n)
+            t0 = clock()
+            if rnd.random() < write_ratio:
+                if rnd.random() < 0.5:
+                    front.insert(k, k)
+                else:
+                    front.delete(k)
+                enqueues[i].append(clock() - t0)
+                nwrites += 1
+                if nwrites % VISIBLE_EVERY == 0:
+                    front.flush()
+                    visible[i].append(clock() - t0)
+            else:
+                front.get(k)
+                reads[i].append(clock() - t0)
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    t0 = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    front.flush()
+    elapsed = time.perf_counter() - t0
+    return (threads * ops / elapsed,
+            sorted(x for r in reads for x in r),
+            sorted(x for w in enqueues for x in w),
+            sorted(x for w in visible for x in w))
+
+
+def main(n, threads, ops, write_ratio):
+    items = [(k, k) for k in range(0, 2 * n, 2)]
+    print("n=%d threads=%d ops/thread=%d writes=%.0f%%"
+          % (n, threads, ops, write_ratio * 100))
+    print("%-12s %10s %10s %10s %12s %12s %12s %12s"
+          % ("front-end", "ops/s", "read p50", "read p99",
+             "enqueue p50", "enqueue p99", "visible p50", "visible p99"))
+    fronts = (("global lock", lambda: LockedAVLTree(AVLTree.from_sorted(items))),
+              ("concurrent", lambda: ConcurrentAVLTree(AVLTree.from_sorted(items))))
+    for name, make in fronts:
+        front = make()
+        tput, reads, enqueues, visible = run(front, n, threads, ops, write_ratio)
+        if isinstance(front, ConcurrentAVLTree):
+            front.close()
+        print("%-12s %10.0f %8.1fus %8.1fus %10.1fus %10.1fus %10.1fus %10.1fus"
+              % (name, tput,
+                 percentile(reads, 50) * 1e6, percentile(reads, 99) * 1e6,
+                 percentile(enqueues, 50) * 1e6, percentile(enqueues, 99) * 1e6,
+                 percentile(visible, 50) * 1e6, percentile(visible, 99) * 1e6))
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 100000,
+         int(args[1]) if len(args) > 1 else 8,
+         int(args[2]) if len(args) > 2 else 20000,
+         float(args[3]) if len(args) > 3 else 0.1)
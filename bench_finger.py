@@ -0,0 +1,41 @@
+# bench_finger.py
+# Finger-search insertion (start="max") vs root insertion on key streams.
+# usage: python bench_finger.py [n]
+import random
+import sys
+import time
+
+from AVLTree import AVLTree
+
+
+def streams(n):
+    rnd = random.Random(n)
+    ascending = list(range(n))
+    near = list(range(n))
+    # ~5% late arrivals, each a short distance behind its slot
+    for i in rnd.sample(range(n), n // 20):
+        j = max(0, i - rnd.randint(1, 50))
+        near[i], near[j] = near[j], near[i]
+    shuffled = list(range(n))
+    rnd.shuffle(shuffled)
+    return [("sorted", ascending), ("near-sorted", near), ("random", shuffled)]
+
+
+def time_inserts(keys, start):
+    t = AVLTree()
+    t0 = time.perf_counter()
+    for k in keys:
+        t.insert(k, k, start)
+    return time.perf_counter() - t0
+
+
+def main(n):
+    print("%-12s %10s %10s %8s" % ("stream", "root (s)", "max (s)", "speedup"))
+    for name, keys in streams(n):
+        root = time_inserts(keys, "root")
+        finger = time_inserts(keys, "max")
+        print("%-12s %10.3f %10.3f %7.2fx" % (name, root, finger, root / finger))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,35 @@
+# bench_memory.py
+# Bytes per entry of the object-node AVLTree vs the array-backed ArrayAVLTree.
+# usage: python bench_memory.py [n ...]
+import random
+import sys
+import tracemalloc
+
+from AVLTree import AVLTree
+from ArrayAVLTree import ArrayAVLTree
+
+
+def bytes_per_entry(tree_cls, keys):
+    # keys/values are allocated before tracing so only tree overhead is measured
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    t = tree_cls()
+    for k in keys:
+        t.insert(k, k)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used / len(keys)
+
+
+def main(sizes):
+    print("%10s %14s %14s" % ("n", "AVLTree", "ArrayAVLTree"))
+    for n in sizes:
+        keys = list(range(n))
+        random.Random(n).shuffle(keys)
+        obj = bytes_per_entry(AVLTree, keys)
+        arr = bytes_per_entry(ArrayAVLTree, keys)
+        print("%10d %12.1f B %12.1f B" % (n, obj, arr))
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10 ** 3, 10 ** 4, 10 ** 5])
@@ -0,0 +1,45 @@
+# bench_search_many.py
+# Batch point lookups: looped search vs search_many vs a frozen NumPy index.
+# usage: python bench_search_many.py [n] [max_batch]
+import random
+import sys
+import time
+
+from AVLTree import AVLTree
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def main(n, max_batch):
+    tree = AVLTree.from_sorted((k, k) for k in range(0, 2 * n, 2))
+    frozen = tree.freeze() if np is not None else None
+    rnd = random.Random(n)
+    print("n=%d%s" % (n, "" if frozen else " (numpy missing: frozen column skipped)"))
+    print("%10s %12s %12s %12s" % ("batch", "loop (s)", "many (s)", "frozen (s)"))
+    batch = 10
+    while batch <= max_batch:
+        probes = [rnd.randrange(2 * n) for _ in range(batch)]
+        loop = timed(lambda: [tree.search(k) for k in probes])
+        many = timed(lambda: tree.search_many(probes))
+        if frozen is not None:
+            arr = np.asarray(probes)
+            fz = "%12.5f" % timed(lambda: frozen.get_many(arr))
+        else:
+            fz = "%12s" % "-"
+        print("%10d %12.5f %12.5f %s" % (batch, loop, many, fz))
+        batch *= 10
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 1000000,
+         int(args[1]) if len(args) > 1 else 1000000)
@@ -0,0 +1,79 @@
+# bench_snapshot.py
+# Reader throughput while a writer keeps inserting:
+#   AVLTree + lock: readers take the lock and call avl_to_array() for a view
+#   PersistentAVLTree: readers take an O(1) snapshot() without any lock
+# usage: python bench_snapshot.py [n] [seconds] [readers]
+import random
+import sys
+import threading
+import time
+from bisect import bisect_left
+
+from AVLTree import AVLTree
+from PersistentAVLTree import PersistentAVLTree
+
+PROBES = 100
+
+
+def run(n, seconds, readers, persistent):
+    items = [(k, k) for k in range(0, 2 * n, 2)]
+    if persistent:
+        tree = PersistentAVLTree.from_sorted(items)
+    else:
+        tree = AVLTree.from_sorted(items)
+    lock = threading.Lock()
+    stop = threading.Event()
+    counts = [0] * (readers + 1)
+
+    def writer():
+        w = random.Random(0)
+        while not stop.is_set():
+            k = w.randrange(2 * n)
+            if persistent:
+                tree.insert(k, k)
+            else:
+                with lock:
+                    tree.insert(k, k)
+            counts[readers] += 1
+
+    def reader(i):
+        r = random.Random(i + 1)
+        while not stop.is_set():
+            probes = [r.randrange(2 * n) for _ in range(PROBES)]
+            if persistent:
+                view = tree.snapshot()
+                for k in probes:
+                    view.search(k)
+            else:
+                with lock:
+                    view = tree.avl_to_array()
+                for k in probes:
+                    bisect_left(view, (k,))
+            counts[i] += 1
+
+    threads = [threading.Thread(target=writer)]
+    threads += [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    reads = sum(counts[:readers]) * PROBES / seconds
+    writes = counts[readers] / seconds
+    return reads, writes
+
+
+def main(n, seconds, readers):
+    print("n=%d, %d reader threads, %.1fs each" % (n, readers, seconds))
+    print("%-18s %14s %14s" % ("mode", "lookups/s", "writes/s"))
+    for name, persistent in (("lock+avl_to_array", False), ("snapshot", True)):
+        reads, writes = run(n, seconds, readers, persistent)
+        print("%-18s %14.0f %14.0f" % (name, reads, writes))
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 100000,
+         float(args[1]) if len(args) > 1 else 3.0,
+         int(args[2]) if len(args) > 2 else 4)
@@ -0,0 +1,121 @@
+# bench_suite.py
+# AVLTree regression benchmark: insert / search / delete over several key
+# streams and sizes, with AVLTree.enable_stats() counters, emitted as JSON.
+# usage: python bench_suite.py [--sizes 1e3,1e4,1e5] [--streams ...] [--out FILE]
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+from AVLTree import AVLTree
+
+
+def zigzag(n):
+    # alternate ends inward: every insert lands on a fresh side of the tree
+    # and keeps triggering double rotations
+    lo, hi = 0, n - 1
+    out = []
+    while lo <= hi:
+        out.append(lo)
+        if lo != hi:
+            out.append(hi)
+        lo, hi = lo + 1, hi - 1
+    return out
+
+
+def make_stream(name, n, seed=0):
+    if name == "random":
+        keys = list(range(n))
+        random.Random(seed).shuffle(keys)
+        return keys
+    if name == "sorted":
+        return list(range(n))
+    if name == "reverse":
+        return list(range(n - 1, -1, -1))
+    if name == "adversarial":
+        return zigzag(n)
+    raise ValueError("unknown stream %r" % name)
+
+
+STREAMS = ("random", "sorted", "reverse", "adversarial")
+
+
+def run_one(stream, n, stats):
+    keys = make_stream(stream, n)
+    probes = keys[:]
+    random.Random(1).shuffle(probes)
+
+    t = AVLTree()
+    if stats:
+        t.enable_stats()
+    t0 = time.perf_counter()
+    for k in keys:
+        t.insert(k, k)
+    t1 = time.perf_counter()
+    for k in probes:
+        t.search(k)
+    t2 = time.perf_counter()
+    # delete moves keys between nodes, so each node is looked up just before
+    # its delete; the class method keeps those lookups out of the search
+    # stats, and only the delete calls are timed
+    find = AVLTree.search
+    delete_s = 0.0
+    for k in keys:
+        node = find(t, k)
+        d0 = time.perf_counter()
+        t.delete(node)
+        delete_s += time.perf_counter() - d0
+
+    result = {
+        "stream": stream,
+        "n": n,
+        "insert_s": t1 - t0,
+        "search_s": t2 - t1,
+        "delete_s": delete_s,
+        "insert_ops_per_s": n / (t1 - t0),
+        "search_ops_per_s": n / (t2 - t1),
+        "delete_ops_per_s": n / delete_s,
+    }
+    if stats:
+        result["stats"] = t.stats.as_dict()
+    return result
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="1e3,1e4,1e5",
+                    help="comma separated key counts, e.g. 1e3,1e5,1e7")
+    ap.add_argument("--streams", default=",".join(STREAMS))
+    ap.add_argument("--no-stats", action="store_true",
+                    help="time the uninstrumented tree only")
+    ap.add_argument("--out", help="write JSON here instead of stdout")
+    args = ap.parse_args(argv)
+
+    sizes = [int(float(s)) for s in args.sizes.split(",")]
+    streams = args.streams.split(",")
+    report = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": [],
+    }
+    for n in sizes:
+        for stream in streams:
+            report["results"].append(run_one(stream, n, not args.no_stats))
+            print("done %s n=%d" % (stream, n), file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
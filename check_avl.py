@@ -0,0 +1,137 @@
+# check_avl.py
+# Regression check for the rebalance path: random insert/delete sequences,
+# finger inserts, insert_many batches (per-key and rebuild paths) and
+# split -> join/concat round trips on verify=True trees, which after every
+# change re-check heights, |bf| <= 1 and the size/bf0 aggregates against a
+# full recount. With numpy installed, freeze() must round-trip every key set.
+# usage: python check_avl.py [seeds] [ops]
+import random
+import struct
+import sys
+
+from AVLTree import AVLTree
+from ArrayAVLTree import ArrayAVLTree
+
+
+def check_balance(t):
+    stack = [t.root]
+    while stack:
+        n = stack.pop()
+        if not n.is_real_node():
+            continue
+        assert n.height == 1 + max(n.left.height, n.right.height), n.key
+        assert abs(n.left.height - n.right.height) <= 1, n.key
+        stack.append(n.left)
+        stack.append(n.right)
+
+
+def run(seed, ops):
+    rnd = random.Random(seed)
+    t = AVLTree(verify=True)
+    a = ArrayAVLTree(verify=True)
+    ref = {}
+    for _ in range(ops):
+        k = rnd.randrange(ops // 2 + 1)
+        if rnd.random() < 0.55:
+            start = rnd.choice(("root", "max", "finger"))
+            if start == "finger" and ref:
+                f = rnd.choice(list(ref))
+                t.insert(k, k, t.search(f))
+                a.insert(k, k, a.search(f))
+            else:
+                t.insert(k, k, start)
+                a.insert(k, k, start)
+            ref[k] = k
+        elif k in ref:
+            t.delete(t.search(k))
+            a.delete(a.search(k))
+            del ref[k]
+        check_balance(t)
+    expected = sorted(ref.items())
+    assert t.avl_to_array() == expected
+    assert a.avl_to_array() == expected
+    return t, ref
+
+
+def run_bulk(seed, ops):
+    """from_sorted, then insert_many batches small enough for per-key
+    inserts and big enough to trigger the rebuild, interleaved with deletes."""
+    rnd = random.Random(seed)
+    ref = {k: k for k in range(0, ops, 3)}
+    t = AVLTree.from_sorted(sorted(ref.items()), verify=True)
+    for _ in range(20):
+        k = rnd.choice((1, 5, ops // 10, ops))
+        batch = [(rnd.randrange(4 * ops), rnd.random()) for _ in range(k)]
+        t.insert_many(batch)
+        ref.update(batch)
+        for key in rnd.sample(sorted(ref), min(10, len(ref))):
+            t.delete(t.search(key))
+            del ref[key]
+        check_balance(t)
+    assert t.avl_to_array() == sorted(ref.items())
+
+
+def run_split_join(t, ref, rnd):
+    keys = sorted(ref)
+    for _ in range(10):
+        expected = sorted(ref.items())
+        cut = rnd.randrange(-1, len(keys) + 2)
+        lo, hi = t.split(cut)
+        check_balance(lo)
+        check_balance(hi)
+        assert lo.avl_to_array() == [kv for kv in expected if kv[0] < cut]
+        assert hi.avl_to_array() == [kv for kv in expected if kv[0] >= cut]
+        pivot = None if cut in ref else (cut, cut)
+        if pivot is not None and lo.size() and hi.size():
+            t = AVLTree.join(lo, pivot, hi)
+            ref[cut] = cut
+            keys = sorted(ref)
+        else:
+            t = AVLTree.concat(lo, hi)
+        check_balance(t)
+        assert t.avl_to_array() == sorted(ref.items())
+        assert t.size() == len(ref)
+
+
+FREEZE_KEYS = (
+    list(range(-50, 50)),
+    [k / 4.0 for k in range(100)],
+    [2 ** 70 + k for k in range(10)],
+    [b"a", b"a\0", b"a\0\0", b"b", b""] + [struct.pack(">I", k) for k in range(300)],
+    ["x", "x\0", "y\0z", ""],
+    [1, 2.5, 3, True],
+    [(1, 2), (1, 3), (2,)],
+)
+
+
+def run_freeze():
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return False
+    for keys in FREEZE_KEYS:
+        t = AVLTree()
+        for k in keys:
+            t.insert(k, k)
+        f = t.freeze()
+        expected = t.avl_to_array()
+        assert f.avl_to_array() == expected, keys[:5]
+        probes = [k for k, _ in expected]
+        assert f.index_of(probes).tolist() == list(range(len(probes))), keys[:5]
+        assert f.get_many(probes).tolist() == [v for _, v in expected], keys[:5]
+    return True
+
+
+def main(seeds, ops):
+    for seed in range(seeds):
+        t, ref = run(seed, ops)
+        run_split_join(t, ref, random.Random(seed))
+        run_bulk(seed, ops)
+    if not run_freeze():
+        print("skipped freeze round trip: numpy not installed")
+    print("ok: %d seeds x %d ops" % (seeds, ops))
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 20, int(args[1]) if len(args) > 1 else 2000)